@@ -12,22 +12,28 @@ Python 3.10+
 from __future__ import annotations
 
 import argparse
-import hashlib
-import json
+import asyncio
 import logging
+import math
 import os
 import sys
 import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, fields
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+import httpx
 import numpy as np
+import orjson
 import pandas as pd
-import requests
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import yaml
+from numba import njit, prange
 
 
 # =====================
@@ -52,6 +58,7 @@ class PipelineConfig:
     timeout_seconds: int = 15
     retry_attempts: int = 3
     retry_backoff_seconds: float = 1.5
+    max_retry_after_seconds: float = 60.0
 
 
 # =====================
@@ -61,8 +68,10 @@ class PipelineConfig:
 @dataclass
 class Team:
     team_id: str
+    source: str
     name: Optional[str] = None
     region: Optional[str] = None
+    team_code: int = -1  # dense int32 code referenced by MatchTeam
 
 
 @dataclass
@@ -79,7 +88,14 @@ class Match:
     start_time: Optional[datetime]
     patch: Optional[str]
     tournament: Optional[str]
-    teams: List[str] = field(default_factory=list)
+
+
+@dataclass
+class MatchTeam:
+    match_id: str
+    source: str
+    team_code: int  # joins Team.team_code
+    slot: int
 
 
 @dataclass
@@ -116,160 +132,389 @@ class PlayerRoundStats:
     survived: bool = False
 
 
+# =====================
+# Column Buffers
+# =====================
+
+TABLE_MODELS: Dict[str, type] = {
+    "matches": Match,
+    "match_teams": MatchTeam,
+    "maps": Map,
+    "rounds": Round,
+    "teams": Team,
+    "players": Player,
+    "player_round_stats": PlayerRoundStats,
+}
+
+TABLE_KEYS: Dict[str, Tuple[str, ...]] = {
+    # Source ids share one numeric space, so keys are scoped by source.
+    "matches": ("source", "match_id"),
+    "match_teams": ("source", "match_id", "slot"),
+    "maps": ("map_id",),
+    "rounds": ("round_id",),
+    "teams": ("source", "team_id"),
+    "players": ("player_id",),
+    "player_round_stats": ("round_id", "player_id"),
+}
+
+COLUMN_DTYPES: Dict[str, Dict[str, str]] = {
+    "matches": {"source": "category", "tournament": "category"},
+    "match_teams": {"source": "category", "team_code": "int32", "slot": "int8"},
+    "teams": {"source": "category", "team_code": "int32"},
+}
+
+# Model annotations (strings under postponed evaluation) -> pandas dtypes.
+ANNOTATION_DTYPES: Dict[str, str] = {
+    "str": "string",
+    "Optional[str]": "string",
+    "int": "int64",
+    "bool": "bool",
+    "Optional[bool]": "boolean",
+    "Optional[float]": "float64",
+    "Optional[datetime]": "datetime64[us, UTC]",
+}
+
+# Full per-table dtype schema; every frame is cast to it, empty or not.
+TABLE_SCHEMAS: Dict[str, Dict[str, str]] = {
+    name: {
+        f.name: COLUMN_DTYPES.get(name, {}).get(f.name, ANNOTATION_DTYPES[f.type])
+        for f in fields(model)
+    }
+    for name, model in TABLE_MODELS.items()
+}
+
+DATETIME_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "matches": ("start_time",),
+}
+
+
+def parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse raw epoch seconds and ISO-8601 strings into UTC datetimes in bulk."""
+    epoch = pd.to_numeric(values, errors="coerce")
+    parsed = pd.to_datetime(epoch, unit="s", utc=True).dt.as_unit("us")
+    iso = epoch.isna() & values.notna()
+    if iso.any():
+        parsed[iso] = pd.to_datetime(
+            values[iso], format="ISO8601", utc=True, errors="coerce"
+        ).dt.as_unit("us")
+    return parsed
+
+
+class TableBuffer:
+    """Column-oriented (SoA) accumulators, one list per model field per table."""
+
+    def __init__(self):
+        self.columns: Dict[str, Dict[str, List[Any]]] = {
+            name: {f.name: [] for f in fields(model)}
+            for name, model in TABLE_MODELS.items()
+        }
+        self.team_codes: Dict[Tuple[str, str], int] = {}
+        self.seen_keys: Dict[str, set] = {}
+
+    def claim(self, name: str, key: Any) -> bool:
+        """Record a primary key for ``name``; False if it was already ingested."""
+        seen = self.seen_keys.setdefault(name, set())
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    def add_team(
+        self,
+        source: str,
+        team_id: str,
+        name: Optional[str] = None,
+        region: Optional[str] = None,
+    ) -> int:
+        """Intern a (source, team_id) pair into a dense code, recording its row once."""
+        key = (source, team_id)
+        code = self.team_codes.get(key)
+        if code is None:
+            code = self.team_codes[key] = len(self.team_codes)
+            teams = self.columns["teams"]
+            teams["team_id"].append(team_id)
+            teams["source"].append(source)
+            teams["name"].append(name)
+            teams["region"].append(region)
+            teams["team_code"].append(code)
+        return code
+
+    def __getitem__(self, name: str) -> Dict[str, List[Any]]:
+        return self.columns[name]
+
+    def appenders(self, name: str, *cols: str) -> Tuple[Callable[[Any], None], ...]:
+        """Bound ``list.append`` methods for ``cols`` of table ``name``."""
+        table = self.columns[name]
+        return tuple(table[col].append for col in cols)
+
+    def frame(self, name: str) -> pd.DataFrame:
+        columns = self.columns[name]
+        if not next(iter(columns.values())):
+            schema = TABLE_SCHEMAS[name]
+            return pd.DataFrame(
+                {col: pd.Series(dtype=dtype) for col, dtype in schema.items()}
+            )
+        df = pd.DataFrame(columns, copy=False)
+        for col in DATETIME_COLUMNS.get(name, ()):
+            df[col] = parse_timestamps(df[col])
+        return df.astype(TABLE_SCHEMAS[name])
+
+
 # =====================
 # API Layer
 # =====================
 
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        return max(seconds, 0.0) if math.isfinite(seconds) else None
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        # RFC 2822 "-0000" dates parse as naive; HTTP dates are always GMT.
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """Async rate limiter: bursts of up to ``rate`` requests, refilled at ``rate``/s."""
+
+    def __init__(self, rate: float):
+        self.rate = max(rate, 1)
+        self._tokens = float(self.rate)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.rate, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens < 1:
+                # Hold the lock while waiting so callers are served in order.
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 0.0
+                self._updated = time.monotonic()
+            else:
+                self._tokens -= 1
+
+
 class ApiClient(ABC):
-    def __init__(self, base_url: str, api_key: Optional[str], config: PipelineConfig):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str],
+        config: PipelineConfig,
+        http: httpx.AsyncClient,
+    ):
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.config = config
-        self.session = requests.Session()
-        self._last_request_ts = 0.0
+        self.http = http
+        limit = config.request_limits.get(self.__class__.__name__, 1)
+        self._semaphore = asyncio.Semaphore(max(limit, 1))
+        self._bucket = TokenBucket(limit)
 
-    def _rate_limit(self) -> None:
-        limit = self.config.request_limits.get(self.__class__.__name__, 1)
-        elapsed = time.time() - self._last_request_ts
-        if elapsed < 1.0 / max(limit, 1):
-            time.sleep((1.0 / limit) - elapsed)
-        self._last_request_ts = time.time()
-
-    def _request(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    async def _request(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         url = f"{self.base_url}/{path.lstrip('/')}"
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
         for attempt in range(self.config.retry_attempts):
+            last_attempt = attempt >= self.config.retry_attempts - 1
+            delay = self.config.retry_backoff_seconds * (attempt + 1)
             try:
-                self._rate_limit()
-                resp = self.session.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    timeout=self.config.timeout_seconds,
+                async with self._semaphore:
+                    await self._bucket.acquire()
+                    resp = await self.http.get(url, params=params, headers=headers)
+                if resp.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    resp.raise_for_status()
+                    return orjson.loads(resp.content)
+                # Transient status: honor the server's backoff if it sent one.
+                retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    if retry_after > self.config.max_retry_after_seconds:
+                        logging.error(
+                            "API request failed: %s asked to retry after %.0fs "
+                            "(max %.0fs)",
+                            url, retry_after, self.config.max_retry_after_seconds,
+                        )
+                        return None
+                    delay = retry_after
+                logging.warning(
+                    "API request got %d, retrying in %.1fs: %s",
+                    resp.status_code, delay, url,
                 )
-                resp.raise_for_status()
-                return resp.json()
+            except httpx.HTTPStatusError as e:
+                logging.error("API request failed: %s %s", url, e)
+                return None
             except Exception as e:
-                if attempt >= self.config.retry_attempts - 1:
+                if last_attempt:
                     logging.error("API request failed: %s %s", url, e)
                     return None
-                time.sleep(self.config.retry_backoff_seconds * (attempt + 1))
+            await asyncio.sleep(delay)
         return None
 
     @abstractmethod
-    def fetch_matches(self) -> Iterable[Dict[str, Any]]:
+    async def fetch_matches(self) -> Iterable[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    def normalize(self, raw: Dict[str, Any]) -> Tuple[
-        List[Match],
-        List[Map],
-        List[Round],
-        List[Team],
-        List[Player],
-        List[PlayerRoundStats],
-    ]:
+    def normalize_many(self, raws: Iterable[Dict[str, Any]], out: TableBuffer) -> None:
+        """Append the rows derived from a batch of raw matches to ``out``."""
         pass
 
 
 class VLRClient(ApiClient):
-    def __init__(self, config: PipelineConfig):
-        super().__init__("https://vlrggapi.vercel.app", None, config)
+    def __init__(self, config: PipelineConfig, http: httpx.AsyncClient):
+        super().__init__("https://vlrggapi.vercel.app", None, config, http)
 
-    def fetch_matches(self) -> Iterable[Dict[str, Any]]:
-        data = self._request("/match")
+    async def fetch_matches(self) -> Iterable[Dict[str, Any]]:
+        data = await self._request("/match")
         if not data or "data" not in data:
             return []
         return data["data"][: self.config.max_matches_to_fetch]
 
-    def normalize(self, raw: Dict[str, Any]):
-        matches, maps, rounds, teams, players, prs = [], [], [], [], [], []
-
-        match_id = str(raw.get("match_id"))
-        start_time = None
-        if raw.get("time"):
-            start_time = datetime.fromtimestamp(int(raw["time"]), tz=timezone.utc)
-
-        team_ids = []
-        for t in raw.get("teams", []):
-            tid = str(t.get("id"))
-            team_ids.append(tid)
-            teams.append(Team(team_id=tid, name=t.get("name")))
-
-        matches.append(
-            Match(
-                match_id=match_id,
-                source="vlr",
-                start_time=start_time,
-                patch=None,
-                tournament=raw.get("event"),
-                teams=team_ids,
-            )
+    def normalize_many(self, raws: Iterable[Dict[str, Any]], out: TableBuffer) -> None:
+        # Column appends and buffer methods are bound once per batch so the
+        # hot loop only touches the raw payload.
+        claim, add_team = out.claim, out.add_team
+        m_id, m_source, m_start, m_patch, m_tournament = out.appenders(
+            "matches", "match_id", "source", "start_time", "patch", "tournament"
         )
+        mt_match, mt_source, mt_team, mt_slot = out.appenders(
+            "match_teams", "match_id", "source", "team_code", "slot"
+        )
+
+        for raw in raws:
+            match_id = str(raw.get("match_id"))
+            if not claim("matches", ("vlr", match_id)):
+                continue
 
-        return matches, maps, rounds, teams, players, prs
+            for slot, t in enumerate(raw.get("teams", [])):
+                mt_match(match_id)
+                mt_source("vlr")
+                mt_team(add_team("vlr", str(t.get("id")), name=t.get("name")))
+                mt_slot(slot)
+
+            m_id(match_id)
+            m_source("vlr")
+            # Epoch seconds; parsed in bulk by TableBuffer.frame.
+            m_start(raw.get("time") or None)
+            m_patch(None)
+            m_tournament(raw.get("event"))
 
 
 class GridClient(ApiClient):
-    def __init__(self, config: PipelineConfig):
-        super().__init__("https://api.grid.gg/v2", config.api_keys.get("grid"), config)
+    def __init__(self, config: PipelineConfig, http: httpx.AsyncClient):
+        super().__init__(
+            "https://api.grid.gg/v2", config.api_keys.get("grid"), config, http
+        )
 
-    def fetch_matches(self) -> Iterable[Dict[str, Any]]:
+    async def fetch_matches(self) -> Iterable[Dict[str, Any]]:
         params = {"page[size]": self.config.max_matches_to_fetch}
-        data = self._request("/matches", params=params)
+        data = await self._request("/matches", params=params)
         if not data or "data" not in data:
             return []
         return data["data"]
 
-    def normalize(self, raw: Dict[str, Any]):
-        matches, maps, rounds, teams, players, prs = [], [], [], [], [], []
+    def normalize_many(self, raws: Iterable[Dict[str, Any]], out: TableBuffer) -> None:
+        claim, add_team = out.claim, out.add_team
+        m_id, m_source, m_start, m_patch, m_tournament = out.appenders(
+            "matches", "match_id", "source", "start_time", "patch", "tournament"
+        )
+        mt_match, mt_source, mt_team, mt_slot = out.appenders(
+            "match_teams", "match_id", "source", "team_code", "slot"
+        )
 
-        match_id = raw.get("id")
-        start_time = None
-        if raw.get("attributes", {}).get("start_time"):
-            start_time = datetime.fromisoformat(
-                raw["attributes"]["start_time"].replace("Z", "+00:00")
-            )
+        for raw in raws:
+            match_id = raw.get("id")
+            if not claim("matches", ("grid", match_id)):
+                continue
 
-        team_ids = []
-        for rel in raw.get("relationships", {}).get("teams", {}).get("data", []):
-            team_ids.append(rel["id"])
-            teams.append(Team(team_id=rel["id"]))
-
-        matches.append(
-            Match(
-                match_id=match_id,
-                source="grid",
-                start_time=start_time,
-                patch=None,
-                tournament=None,
-                teams=team_ids,
-            )
-        )
+            teams = raw.get("relationships", {}).get("teams", {}).get("data", [])
+            for slot, rel in enumerate(teams):
+                mt_match(match_id)
+                mt_source("grid")
+                mt_team(add_team("grid", rel["id"]))
+                mt_slot(slot)
 
-        return matches, maps, rounds, teams, players, prs
+            m_id(match_id)
+            m_source("grid")
+            # ISO-8601 string; parsed in bulk by TableBuffer.frame.
+            m_start(raw.get("attributes", {}).get("start_time") or None)
+            m_patch(None)
+            m_tournament(None)
 
 
 # =====================
 # Feature Engineering
 # =====================
 
+@njit(parallel=True, cache=True)
+def _enrich_kernel(kills, deaths, codes, n_groups):
+    # Mirrors groupby(...).transform("mean"): rows with a null player
+    # (code -1) and NaN kills are skipped, and yield NaN where undefined.
+    n = len(kills)
+    sums = np.zeros(n_groups)
+    counts = np.zeros(n_groups)
+    for i in range(n):
+        code = codes[i]
+        if code >= 0 and not np.isnan(kills[i]):
+            sums[code] += kills[i]
+            counts[code] += 1
+    survived = np.empty(n, np.bool_)
+    aggression = np.empty(n)
+    consistency = np.empty(n)
+    for i in prange(n):
+        survived[i] = deaths[i] == 0
+        aggression[i] = kills[i] / (deaths[i] + 1)
+        code = codes[i]
+        if code >= 0 and counts[code] > 0:
+            consistency[i] = sums[code] / counts[code]
+        else:
+            consistency[i] = np.nan
+    return survived, aggression, consistency
+
+
 class FeatureEngineer:
     def __init__(self, flags: Dict[str, bool]):
         self.flags = flags
 
     def enrich_player_round_stats(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.empty:
+            # Keep the output columns (and dtypes) without invoking the JIT.
+            survived = np.empty(0, np.bool_)
+            aggression = np.empty(0)
+            consistency = np.empty(0)
+        else:
+            codes, uniques = pd.factorize(df["player_id"], sort=False)
+            survived, aggression, consistency = _enrich_kernel(
+                df["kills"].to_numpy(dtype=np.float64, na_value=np.nan),
+                df["deaths"].to_numpy(dtype=np.float64, na_value=np.nan),
+                codes,
+                len(uniques),
+            )
         if self.flags.get("survival_rate"):
-            df["survived"] = df["deaths"] == 0
+            df["survived"] = survived
         if self.flags.get("aggression_index"):
-            df["aggression_index"] = df["kills"] / (df["deaths"] + 1)
+            df["aggression_index"] = aggression
         if self.flags.get("consistency_index"):
-            df["consistency_index"] = (
-                df.groupby("player_id")["kills"].transform("mean")
-            )
+            df["consistency_index"] = consistency
         return df
 
 
@@ -278,14 +523,28 @@ class FeatureEngineer:
 # =====================
 
 class Validator:
-    def validate_dataframe(self, df: pd.DataFrame, name: str) -> pd.DataFrame:
-        if df.empty:
+    def validate_dataframe(
+        self, df: pd.DataFrame, name: str, pk: Optional[Tuple[str, ...]] = None
+    ) -> pd.DataFrame:
+        """Log sparse columns and drop duplicate rows, by ``pk`` when given."""
+        n = len(df)
+        if n == 0:
             return df
-        null_ratio = df.isnull().mean()
-        bad_cols = null_ratio[null_ratio > 0.9]
-        if not bad_cols.empty:
-            logging.warning("High null ratio in %s: %s", name, bad_cols.to_dict())
-        return df.drop_duplicates()
+        # count() is a per-column C-level reduction; avoids a full bool frame.
+        null_ratio = 1.0 - df.count().to_numpy() / n
+        mask = null_ratio > 0.9
+        if mask.any():
+            bad_cols = dict(zip(df.columns[mask], null_ratio[mask].tolist()))
+            logging.warning("High null ratio in %s: %s", name, bad_cols)
+        if not pk:
+            return df.drop_duplicates()
+        dupes = df.duplicated(subset=list(pk))
+        if dupes.any():
+            logging.warning(
+                "Dropping %d rows with duplicate %s in %s", dupes.sum(), pk, name
+            )
+            return df[~dupes]
+        return df
 
 
 # =====================
@@ -293,30 +552,134 @@ class Validator:
 # =====================
 
 class CacheManager:
+    """Append-only JSONL cache, loaded into memory once per run."""
+
     def __init__(self, path: str):
         self.base = Path(path)
         self.base.mkdir(parents=True, exist_ok=True)
+        self.fp = self.base / "cache.jsonl"
+        self._mem: Dict[str, Any] = {}
+        self._pending: List[str] = []
+        # True when the file does not end in a newline (e.g. a killed flush).
+        self._torn_tail = False
+        if self.fp.exists():
+            with open(self.fp, "rb") as f:
+                for lineno, line in enumerate(f, 1):
+                    self._torn_tail = not line.endswith(b"\n")
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = orjson.loads(line)
+                        self._mem[entry["key"]] = entry["data"]
+                    except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+                        logging.warning(
+                            "Skipping corrupt cache line %s:%d: %s", self.fp, lineno, e
+                        )
+
+    def resolve_many(self, items: Iterable[Tuple[str, Any]]) -> List[Any]:
+        """Swap in cached payloads for known keys and record the rest, in one pass."""
+        mem, pending = self._mem, self._pending
+        resolved = []
+        for key, data in items:
+            cached = mem.get(key)
+            if cached:
+                data = cached
+            else:
+                mem[key] = data
+                pending.append(key)
+            resolved.append(data)
+        return resolved
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with open(self.fp, "ab") as f:
+            if self._torn_tail:
+                f.write(b"\n")
+                self._torn_tail = False
+            for key in self._pending:
+                f.write(
+                    orjson.dumps(
+                        {"key": key, "data": self._mem[key]},
+                        option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY,
+                    )
+                )
+        self._pending.clear()
 
-    def _hash(self, key: str) -> str:
-        return hashlib.sha256(key.encode()).hexdigest()
 
-    def load(self, key: str) -> Optional[Any]:
-        fp = self.base / f"{self._hash(key)}.json"
-        if fp.exists():
-            with open(fp, "r") as f:
-                return json.load(f)
-        return None
+# =====================
+# Export
+# =====================
+
+PARQUET_ROW_GROUP_SIZE = 65_536
+
+
+def arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """Arrow schema from the frame's dtypes, so empty and populated tables agree."""
+    arrow_fields = []
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            typ = pa.dictionary(pa.int32(), pa.string())
+        elif isinstance(dtype, pd.StringDtype):
+            typ = pa.string()
+        elif isinstance(dtype, pd.BooleanDtype):
+            typ = pa.bool_()
+        elif isinstance(dtype, pd.DatetimeTZDtype):
+            typ = pa.timestamp(dtype.unit, tz=str(dtype.tz))
+        elif dtype == object:
+            typ = pa.Schema.from_pandas(df[[col]], preserve_index=False).field(col).type
+        else:
+            typ = pa.from_numpy_dtype(dtype)
+        arrow_fields.append(pa.field(col, typ))
+    return pa.schema(arrow_fields)
+
+
+def write_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Stream a frame to Parquet one zstd row group at a time."""
+    schema = arrow_schema(df)
+    with pq.ParquetWriter(
+        path, schema, compression="zstd", use_dictionary=True
+    ) as writer:
+        for start in range(0, len(df), PARQUET_ROW_GROUP_SIZE):
+            chunk = df.iloc[start : start + PARQUET_ROW_GROUP_SIZE]
+            writer.write_batch(
+                pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+
 
-    def save(self, key: str, data: Any) -> None:
-        fp = self.base / f"{self._hash(key)}.json"
-        with open(fp, "w") as f:
-            json.dump(data, f)
+def write_csv(df: pd.DataFrame, path: Path) -> None:
+    """Write a frame with Arrow's CSV writer, typed like its Parquet counterpart."""
+    table = pa.Table.from_pandas(df, schema=arrow_schema(df), preserve_index=False)
+    pacsv.write_csv(
+        table, str(path), write_options=pacsv.WriteOptions(include_header=True)
+    )
 
 
 # =====================
 # Pipeline
 # =====================
 
+async def fetch_all(
+    config: PipelineConfig,
+) -> List[Tuple[ApiClient, Iterable[Dict[str, Any]]]]:
+    """Fetch raw matches from every enabled source over one shared HTTP/2 pool."""
+    limits = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=limits,
+        timeout=config.timeout_seconds,
+        follow_redirects=True,
+    ) as http:
+        clients: List[ApiClient] = []
+        if "vlr" in config.enabled_sources:
+            clients.append(VLRClient(config, http))
+        if "grid" in config.enabled_sources:
+            clients.append(GridClient(config, http))
+
+        results = await asyncio.gather(*(c.fetch_matches() for c in clients))
+    return list(zip(clients, results))
+
+
 def run_pipeline(config: PipelineConfig) -> None:
     logging.basicConfig(
         level=getattr(logging, config.logging_level.upper(), logging.INFO),
@@ -327,56 +690,54 @@ def run_pipeline(config: PipelineConfig) -> None:
     validator = Validator()
     feature_engineer = FeatureEngineer(config.feature_flags)
 
-    clients: List[ApiClient] = []
-    if "vlr" in config.enabled_sources:
-        clients.append(VLRClient(config))
-    if "grid" in config.enabled_sources:
-        clients.append(GridClient(config))
-
-    all_matches, all_maps, all_rounds, all_teams, all_players, all_prs = (
-        [],
-        [],
-        [],
-        [],
-        [],
-        [],
-    )
+    fetched = asyncio.run(fetch_all(config))
+
+    buffer = TableBuffer()
+
+    for client, raw_matches in fetched:
+        resolved = list(raw_matches)
+        if config.caching_enabled:
+            prefix = client.__class__.__name__
+            resolved = cache.resolve_many(
+                (f"{prefix}:{raw.get('id') or raw.get('match_id')}", raw)
+                for raw in resolved
+            )
+
+        client.normalize_many(resolved, buffer)
+
+    if config.caching_enabled:
+        cache.flush()
 
-    for client in clients:
-        raw_matches = client.fetch_matches()
-        for raw in raw_matches:
-            key = f"{client.__class__.__name__}:{raw.get('id') or raw.get('match_id')}"
-            if config.caching_enabled:
-                cached = cache.load(key)
-                if cached:
-                    raw = cached
-                else:
-                    cache.save(key, raw)
-
-            m, mp, r, t, p, prs = client.normalize(raw)
-            all_matches.extend(m)
-            all_maps.extend(mp)
-            all_rounds.extend(r)
-            all_teams.extend(t)
-            all_players.extend(p)
-            all_prs.extend(prs)
-
-    df_matches = pd.DataFrame([asdict(x) for x in all_matches])
-    df_maps = pd.DataFrame([asdict(x) for x in all_maps])
-    df_rounds = pd.DataFrame([asdict(x) for x in all_rounds])
-    df_teams = pd.DataFrame([asdict(x) for x in all_teams])
-    df_players = pd.DataFrame([asdict(x) for x in all_players])
-    df_prs = pd.DataFrame([asdict(x) for x in all_prs])
+    df_matches = buffer.frame("matches")
+    df_match_teams = buffer.frame("match_teams")
+    df_maps = buffer.frame("maps")
+    df_rounds = buffer.frame("rounds")
+    df_teams = buffer.frame("teams")
+    df_players = buffer.frame("players")
+    df_prs = buffer.frame("player_round_stats")
 
     df_prs = feature_engineer.enrich_player_round_stats(df_prs)
 
     dfs = {
-        "matches": validator.validate_dataframe(df_matches, "matches"),
-        "maps": validator.validate_dataframe(df_maps, "maps"),
-        "rounds": validator.validate_dataframe(df_rounds, "rounds"),
-        "teams": validator.validate_dataframe(df_teams, "teams"),
-        "players": validator.validate_dataframe(df_players, "players"),
-        "player_round_stats": validator.validate_dataframe(df_prs, "player_round_stats"),
+        "matches": validator.validate_dataframe(
+            df_matches, "matches", pk=TABLE_KEYS["matches"]
+        ),
+        "match_teams": validator.validate_dataframe(
+            df_match_teams, "match_teams", pk=TABLE_KEYS["match_teams"]
+        ),
+        "maps": validator.validate_dataframe(df_maps, "maps", pk=TABLE_KEYS["maps"]),
+        "rounds": validator.validate_dataframe(
+            df_rounds, "rounds", pk=TABLE_KEYS["rounds"]
+        ),
+        "teams": validator.validate_dataframe(
+            df_teams, "teams", pk=TABLE_KEYS["teams"]
+        ),
+        "players": validator.validate_dataframe(
+            df_players, "players", pk=TABLE_KEYS["players"]
+        ),
+        "player_round_stats": validator.validate_dataframe(
+            df_prs, "player_round_stats", pk=TABLE_KEYS["player_round_stats"]
+        ),
     }
 
     out = Path(config.output_path)
@@ -384,9 +745,9 @@ def run_pipeline(config: PipelineConfig) -> None:
 
     for name, df in dfs.items():
         if config.output_format == "parquet":
-            df.to_parquet(out / f"{name}.parquet", index=False)
+            write_parquet(df, out / f"{name}.parquet")
         else:
-            df.to_csv(out / f"{name}.csv", index=False)
+            write_csv(df, out / f"{name}.csv")
 
     logging.info("Ingestion complete")
     for name, df in dfs.items():